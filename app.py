@@ -1,14 +1,29 @@
-from flask import Flask, render_template, send_file, request, redirect, url_for, flash, jsonify, Response
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context, make_response
 import os
+import re
 from werkzeug.utils import secure_filename
 import datetime
+import hashlib
+import base64
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
-from urllib.parse import urlparse, unquote
+import cloudinary.exceptions
+import cloudinary.api_client.call_api
+import cloudinary.utils
+from urllib.parse import unquote, quote
 import requests
-from io import BytesIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import mimetypes
+import zipfile
+import tempfile
+import logging
+import threading
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from config import config
 
 app = Flask(__name__)
@@ -16,6 +31,10 @@ app = Flask(__name__)
 # Load configuration
 config_name = os.environ.get('FLASK_CONFIG') or 'default'
 app.config.from_object(config[config_name])
+config[config_name].init_app(app)
+
+# Logging is configured by init_app (DEBUG in development, WARNING in production)
+logger = logging.getLogger(__name__)
 
 # Cloudinary Configuration
 cloudinary.config(
@@ -24,65 +43,182 @@ cloudinary.config(
     api_secret = app.config['CLOUDINARY_API_SECRET']
 )
 
+# Basic-auth headers for direct Admin API requests, built once rather than per download
+_CLOUDINARY_BASIC = "Basic " + base64.b64encode(
+    f"{app.config['CLOUDINARY_API_KEY']}:{app.config['CLOUDINARY_API_SECRET']}".encode()
+).decode()
+_CLOUDINARY_HEADERS = {
+    'Authorization': _CLOUDINARY_BASIC,
+    'Content-Type': 'application/json'
+}
+
 # Configuration
 ALLOWED_EXTENSIONS = app.config['ALLOWED_EXTENSIONS']
+_ALLOWED_DOTTED = tuple('.' + ext.lower().lstrip('.') for ext in ALLOWED_EXTENSIONS)
+
+# Shared HTTP session so proxied downloads reuse pooled keep-alive connections
+# to Cloudinary instead of paying a TCP + TLS handshake each time. Connection
+# errors and throttled or unavailable responses are retried with backoff
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False
+    )
+))
+
+# Worker threads for independent, blocking Cloudinary calls
+CLOUDINARY_WORKERS = 8
+_pool = ThreadPoolExecutor(max_workers=CLOUDINARY_WORKERS)
+
+# The SDK's urllib3 pool managers keep a single idle connection per host, so
+# all but one of the parallel Admin API calls would reconnect every time.
+# Keep enough alive for every worker thread, and since uploads go to the same
+# api.cloudinary.com host, let the uploader share those warm connections.
+# On App Engine the uploader uses an AppEngineManager with no pools, so it is
+# left alone there. Both patch private SDK module attributes (_http), which is
+# why requirements.txt pins cloudinary==1.36.0; recheck them when upgrading
+_sdk_http = cloudinary.api_client.call_api._http
+_sdk_http.connection_pool_kw['maxsize'] = CLOUDINARY_WORKERS
+if hasattr(cloudinary.uploader._http, 'connection_pool_kw'):
+    cloudinary.uploader._http = _sdk_http
+
+# Resource types listed from the Cloudinary folder
+RESOURCE_TYPES = ['image', 'video', 'raw']
 
-# Create uploads directory if it doesn't exist (for temporary storage)
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+# Block size used when relaying file bodies from Cloudinary to the client
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# In-process cache of the folder listing, shared by all routes
+_resources_cache = {"ts": 0, "data": None, "generation": 0}
+_resources_lock = threading.Lock()
+# Guards the generation check and store, so an invalidation can't slip between them
+_generation_lock = threading.Lock()
+
+# get_file_info() results keyed by (public_id, version); a new version means a changed file
+_file_info_cache = {}
 
 def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(_ALLOWED_DOTTED)
+
+_fromtimestamp = datetime.datetime.fromtimestamp
+_fromisoformat = datetime.datetime.fromisoformat
+_UTC = datetime.timezone.utc
+
+def parse_created_at(created_at):
+    """Convert a Cloudinary created_at value (Unix timestamp or ISO format) to a Unix timestamp"""
+    if not created_at:
+        return None
+    # Dispatch on the type once instead of isinstance + str().isdigit() on every value
+    kind = type(created_at)
+    if kind is int:
+        return float(created_at)
+    if kind is not str:
+        return None
+    if created_at.isdigit():
+        return float(created_at)
+    # Parse ISO format timestamp
+    try:
+        return _fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
 
 def get_file_info(cloudinary_resource):
     """Extract file information from Cloudinary resource"""
     try:
+        get = cloudinary_resource.get
+        
         # Get file size from Cloudinary
-        size_bytes = cloudinary_resource.get('bytes', 0)
+        size_bytes = get('bytes', 0)
         
-        # Get creation date - handle both Unix timestamp and ISO format
-        created_at = cloudinary_resource.get('created_at', '')
-        if created_at:
-            try:
-                # Try to parse as Unix timestamp (integer)
-                if isinstance(created_at, (int, str)) and str(created_at).isdigit():
-                    created_date = datetime.datetime.fromtimestamp(int(created_at))
-                else:
-                    # Parse ISO format timestamp
-                    created_date = datetime.datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                modified_date = created_date.strftime('%Y-%m-%d %H:%M:%S')
-            except (ValueError, TypeError):
-                # Fallback to current time if parsing fails
-                modified_date = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # Creation date was parsed once when the listing was loaded
+        created_ts = get('_created_ts')
+        if created_ts is not None:
+            modified_date = _fromtimestamp(created_ts, _UTC).strftime('%Y-%m-%d %H:%M:%S')
+        elif get('created_at'):
+            # Fallback to current time if parsing failed
+            modified_date = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         else:
             modified_date = 'Unknown'
         
         return {
-            'name': cloudinary_resource.get('original_filename', cloudinary_resource.get('public_id', 'Unknown')),
+            'name': get('original_filename', get('public_id', 'Unknown')),
             'size': size_bytes,
             'modified': modified_date,
+            'modified_ts': int(created_ts) if created_ts is not None else 0,
             'size_formatted': format_file_size(size_bytes),
-            'public_id': cloudinary_resource.get('public_id'),
-            'url': cloudinary_resource.get('secure_url'),
-            'resource_type': cloudinary_resource.get('resource_type', 'auto')
+            'public_id': get('public_id'),
+            'url': get('secure_url'),
+            'resource_type': get('resource_type', 'auto')
         }
     except Exception as e:
-        print(f"Error processing file info: {e}")
+        logger.error("Error processing file info: %s", e)
         return None
 
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+_SIZE_DIV = tuple(1 << (10 * i) for i in range(len(_SIZE_UNITS)))
+
 def format_file_size(size_bytes):
     """Convert bytes to human readable format"""
-    if size_bytes == 0:
+    if size_bytes <= 0:
         return "0B"
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    import math
-    i = int(math.floor(math.log(size_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_bytes / p, 2)
-    return f"{s} {size_names[i]}"
+    # Every 10 bits is one step up in 1024-based units
+    i = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    s = round(size_bytes / _SIZE_DIV[i], 2)
+    return f"{s} {_SIZE_UNITS[i]}"
 
+# Special handling for common file types that might not be detected properly
+_MIME_MAP = {
+    '.pdf': 'application/pdf',
+    '.rar': 'application/x-rar-compressed',
+    '.zip': 'application/zip',
+    '.7z': 'application/x-7z-compressed',
+    '.tar': 'application/x-tar',
+    '.gz': 'application/gzip',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.ppt': 'application/vnd.ms-powerpoint',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.txt': 'text/plain',
+    '.csv': 'text/csv',
+    '.json': 'application/json',
+    '.xml': 'application/xml',
+    '.html': 'text/html',
+    '.css': 'text/css',
+    '.js': 'application/javascript',
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.mp4': 'video/mp4',
+    '.avi': 'video/x-msvideo',
+    '.mov': 'video/quicktime',
+    '.wmv': 'video/x-ms-wmv',
+    '.flv': 'video/x-flv',
+    '.webm': 'video/webm',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.webp': 'image/webp',
+    '.svg': 'image/svg+xml'
+}
+
+# Load the system MIME tables now rather than on the first download
+mimetypes.init()
+
+def attachment_disposition(filename):
+    """Content-Disposition header value that saves the response as filename.
+    Names come from Cloudinary, so quote them rather than trusting them"""
+    fallback = secure_filename(filename) or 'download'
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+@lru_cache(maxsize=512)
 def get_mime_type(filename, content_type=None):
     """Get proper MIME type for file download"""
     # First try to get from content type header
@@ -92,47 +228,10 @@ def get_mime_type(filename, content_type=None):
     # Get file extension
     file_extension = os.path.splitext(filename)[1].lower()
     
-    # Special handling for common file types that might not be detected properly
-    mime_type_map = {
-        '.pdf': 'application/pdf',
-        '.rar': 'application/x-rar-compressed',
-        '.zip': 'application/zip',
-        '.7z': 'application/x-7z-compressed',
-        '.tar': 'application/x-tar',
-        '.gz': 'application/gzip',
-        '.doc': 'application/msword',
-        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        '.xls': 'application/vnd.ms-excel',
-        '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        '.ppt': 'application/vnd.ms-powerpoint',
-        '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-        '.txt': 'text/plain',
-        '.csv': 'text/csv',
-        '.json': 'application/json',
-        '.xml': 'application/xml',
-        '.html': 'text/html',
-        '.css': 'text/css',
-        '.js': 'application/javascript',
-        '.mp3': 'audio/mpeg',
-        '.wav': 'audio/wav',
-        '.mp4': 'video/mp4',
-        '.avi': 'video/x-msvideo',
-        '.mov': 'video/quicktime',
-        '.wmv': 'video/x-ms-wmv',
-        '.flv': 'video/x-flv',
-        '.webm': 'video/webm',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.gif': 'image/gif',
-        '.bmp': 'image/bmp',
-        '.webp': 'image/webp',
-        '.svg': 'image/svg+xml'
-    }
-    
     # Check our custom mapping first
-    if file_extension in mime_type_map:
-        return mime_type_map[file_extension]
+    mime_type = _MIME_MAP.get(file_extension)
+    if mime_type:
+        return mime_type
     
     # Fallback to Python's mimetypes module
     mime_type, _ = mimetypes.guess_type(filename)
@@ -142,122 +241,379 @@ def get_mime_type(filename, content_type=None):
     # Default fallback
     return 'application/octet-stream'
 
-def upload_to_cloudinary(file):
-    """Upload file to Cloudinary"""
-    try:
-        # Get the original filename
-        original_filename = secure_filename(file.filename)
+def resource_filename(resource):
+    """Filename a resource is looked up by in the filename-based routes"""
+    return resource.get('original_filename') or resource.get('public_id', '').split('/')[-1]
+
+# Characters that would need escaping inside an fl_attachment flag
+_ATTACHMENT_UNSAFE = re.compile(r'[^\w.-]')
+
+@lru_cache(maxsize=2048)
+def _signed_attachment_url(public_id, resource_type, version, attachment, asset_format=None):
+    """Signed delivery URL that makes the browser save the file as `attachment`.
+    Cloudinary appends the delivered file's extension to the name itself.
+    Signing is deterministic, so the URL is computed once per file version"""
+    name = attachment or ''
+    # original_filename usually has its extension removed already, so only strip
+    # a suffix that really is the asset's: the public_id's own or its format
+    extensions = {os.path.splitext(public_id)[1].lower()}
+    if asset_format:
+        extensions.add('.' + asset_format.lower())
+    stem, ext = os.path.splitext(name)
+    if ext and ext.lower() in extensions:
+        name = stem
+    name = _ATTACHMENT_UNSAFE.sub('_', name)
+    if name.strip('._'):
+        flags = f'attachment:{name}'
+    else:
+        # Let Cloudinary name the download after the public_id
+        flags = 'attachment'
+    signed_url, _ = cloudinary.utils.cloudinary_url(
+        public_id,
+        resource_type=resource_type,
+        type='upload',
+        sign_url=True,
+        secure=True,
+        flags=flags,
+        version=version
+    )
+    return signed_url
+
+# The SDK only maps a few statuses to exception classes: the Admin API raises
+# RateLimited for 420 and GeneralError for 500, and a plain Exception for anything
+# else, with the status in the message ("Error 503 - ..."). Unparseable bodies from
+# either API carry it as "server response (503)". The uploader raises the base Error
+# with only Cloudinary's message for JSON error bodies, so uploader calls that should
+# be retried use return_error=True and go through _raise_upload_error()
+_ERROR_STATUS = re.compile(r'^Error (\d{3}) - |server response \((\d{3})\)')
+
+# Uploader messages for failures that never reached Cloudinary
+_CONNECTION_ERRORS = ('Socket error', 'Unexpected error')
+
+def _is_transient_status(status):
+    """Whether an HTTP status means rate limiting or a server-side failure"""
+    return status in (420, 429) or status >= 500
+
+def _is_transient(error):
+    """Whether a failed Cloudinary call is worth retrying: rate limiting,
+    a 5xx response, or a connection failure"""
+    match = _ERROR_STATUS.search(str(error))
+    if match:
+        return _is_transient_status(int(match.group(1) or match.group(2)))
+    # Without a status, the Admin API's GeneralError means a socket or urllib3 failure
+    return (isinstance(error, cloudinary.exceptions.GeneralError)
+            or str(error).startswith(_CONNECTION_ERRORS))
+
+def _raise_upload_error(result):
+    """Turn a return_error=True uploader result into an exception _is_transient()
+    can classify, or return it unchanged. The uploader reports a 500 as
+    http_code 200, so that one case can't be told apart and isn't retried"""
+    error = result.get('error')
+    if error and _is_transient_status(error.get('http_code', 0)):
+        raise cloudinary.exceptions.Error(f"Error {error['http_code']} - {error.get('message')}")
+    return result
+
+def _destroy(public_id, resource_type):
+    """cloudinary.uploader.destroy() that raises on retryable failures"""
+    return _raise_upload_error(
+        cloudinary.uploader.destroy(public_id, resource_type=resource_type, return_error=True)
+    )
+
+def _with_retry(fn, *args, max_retries=3, base=0.25, cap=15.0, **kwargs):
+    """Call fn, retrying transient Cloudinary errors with exponential backoff and full jitter"""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries or not _is_transient(e):
+                raise
+            delay = random.random() * min(base * 2 ** attempt, cap)
+            logger.debug("Retrying %s in %.2fs after: %s", fn.__name__, delay, e)
+            time.sleep(delay)
+
+# Resource fields used by the routes; the rest of each Admin API record is dropped
+_LISTING_FIELDS = (
+    'public_id', 'original_filename', 'resource_type', 'version',
+    'bytes', 'created_at', 'secure_url', 'format'
+)
+
+def list_all_resources(resource_type):
+    """List every resource of one type in the folder, following next_cursor across pages"""
+    resources = []
+    # Built once per listing; only the cursor changes from page to page
+    options = {
+        'type': "upload",
+        'resource_type': resource_type,
+        'prefix': app.config['_CLOUDINARY_PREFIX'],
+        'max_results': app.config['CLOUDINARY_PAGE_SIZE']
+    }
+    while True:
+        result = _with_retry(cloudinary.api.resources, **options)
+        # Keep only the fields the app reads, so the cached listing doesn't hold
+        # every page's full resource records
+        resources.extend(
+            {field: resource[field] for field in _LISTING_FIELDS if field in resource}
+            for resource in result.get('resources', [])
+        )
+        cursor = result.get('next_cursor')
+        if not cursor:
+            return resources
+        options['next_cursor'] = cursor
+
+def _load_listing(force=False):
+    """Get the cached folder listing, refreshing it after RESOURCE_CACHE_TTL seconds"""
+    ttl = app.config['RESOURCE_CACHE_TTL']
+    data = _resources_cache["data"]
+    if not force and data is not None and time.monotonic() - _resources_cache["ts"] < ttl:
+        return data
+    
+    with _resources_lock:
+        # Another request may have refreshed the cache while we were waiting
+        data = _resources_cache["data"]
+        if not force and data is not None and time.monotonic() - _resources_cache["ts"] < ttl:
+            return data
+        
+        # A write that finishes while we fetch bumps the generation; this
+        # listing may predate it, so it mustn't be cached then
+        generation = _resources_cache["generation"]
+        
+        # The per-type listings are independent, so fetch them in parallel
+        futures = [(resource_type, _pool.submit(list_all_resources, resource_type)) for resource_type in RESOURCE_TYPES]
+        
+        resources = []
+        complete = True
+        for resource_type, future in futures:
+            try:
+                resources.extend(future.result())
+            except Exception as e:
+                logger.error("Error fetching %s files: %s", resource_type, e)
+                complete = False
+        
+        # Parse creation dates once here rather than on every render, then sort newest first.
+        # Every cached resource ends up with 'bytes' and '_created_ts' keys
+        for resource in resources:
+            resource['_created_ts'] = parse_created_at(resource.get('created_at'))
+            resource.setdefault('bytes', 0)
+        resources.sort(key=lambda r: r['_created_ts'] or 0, reverse=True)
         
-        # Remove file extension to get base name
-        base_name, extension = os.path.splitext(original_filename)
+        # Index the listing once so lookups don't rescan it on every request;
+        # the first resource listed wins when two share a filename
+        by_filename = {}
+        by_public_id = {}
+        for resource in resources:
+            by_filename.setdefault(resource_filename(resource), resource)
+            by_public_id[resource.get('public_id')] = resource
         
-        # Create a unique filename if it already exists
-        counter = 1
-        final_filename = original_filename
+        data = {
+            'resources': resources,
+            'by_filename': by_filename,
+            'by_public_id': by_public_id
+        }
         
-        # Check if file already exists in Cloudinary
+        # Only cache complete listings so a transient error isn't served for the whole TTL
+        with _generation_lock:
+            if complete and _resources_cache["generation"] == generation:
+                _resources_cache["data"] = data
+                _resources_cache["ts"] = time.monotonic()
+        return data
+
+def get_resources(force=False):
+    """Get all resources in the Cloudinary folder"""
+    return _load_listing(force)['resources']
+
+def find_resource(filename):
+    """Find a resource in the folder by filename, or None"""
+    return _load_listing()['by_filename'].get(filename)
+
+def find_resource_by_id(public_id):
+    """Find a resource in the folder by public_id, or None"""
+    return _load_listing()['by_public_id'].get(public_id)
+
+def probe_resource(public_ids, resource_types=RESOURCE_TYPES):
+    """Look public_ids up directly in Cloudinary, trying every resource type in parallel.
+    Returns (resource, resource_type) for the first match in public_ids, then
+    resource_types, order, or (None, None)"""
+    futures = [
+        (rt, _pool.submit(_with_retry, cloudinary.api.resource, public_id, resource_type=rt))
+        for public_id in dict.fromkeys(public_ids)
+        for rt in resource_types
+    ]
+    # The lookups run concurrently, but results are taken in priority order so a
+    # faster lookup of a lower-priority id can't win
+    for rt, future in futures:
         try:
-            existing_files = cloudinary.api.resources(
-                type="upload",
-                prefix=f"{app.config['CLOUDINARY_FOLDER']}/",
-                max_results=100
-            )
-            
-            existing_filenames = [resource.get('original_filename') for resource in existing_files.get('resources', [])]
-            
-            while final_filename in existing_filenames:
-                final_filename = f"{base_name}_{counter}{extension}"
-                counter += 1
-        except:
-            # If we can't check existing files, just use original name
-            pass
+            result = future.result()
+        except Exception as e:
+            logger.debug("Resource lookup as %s failed: %s", rt, e)
+            continue
+        if result and result.get('public_id'):
+            # Skip any lookups that haven't started yet
+            for _, pending in futures:
+                pending.cancel()
+            return result, rt
+    return None, None
+
+def _files_for(data):
+    """File info for every resource in a listing snapshot, built once per snapshot.
+    Entries are reused across refreshes while a resource's public_id and version are unchanged"""
+    global _file_info_cache
+    files = data.get('files')
+    if files is None:
+        previous = _file_info_cache
+        current = {}
+        files = []
+        for resource in data['resources']:
+            key = (resource.get('public_id'), resource.get('version'))
+            file_info = previous.get(key) or get_file_info(resource)
+            if file_info:
+                current[key] = file_info
+                files.append(file_info)
+        # Only keep entries for resources that still exist
+        _file_info_cache = current
+        data['files'] = files
+    return files
+
+def get_files():
+    """Get file info for every resource in the Cloudinary folder"""
+    return _files_for(_load_listing())
+
+def get_files_json():
+    """Get the /api/files payload and its ETag, serialized once per listing refresh"""
+    data = _load_listing()
+    cached = data.get('files_json')
+    if cached is None:
+        payload = app.json.dumps(_files_for(data))
+        cached = data['files_json'] = (payload, hashlib.md5(payload.encode()).hexdigest())
+    return cached
+
+def get_stats():
+    """Get the /api/stats figures, computed once per listing refresh"""
+    data = _load_listing()
+    stats = data.get('stats')
+    if stats is None:
+        all_resources = data['resources']
+        
+        # Total the sizes and count recent uploads (last 24 hours) in one pass
+        total_size = 0
+        recent_count = 0
+        cutoff = time.time() - 86400
+        for resource in all_resources:
+            total_size += resource['bytes']
+            created_ts = resource['_created_ts']
+            if created_ts is not None and created_ts > cutoff:
+                recent_count += 1
+        
+        stats = data['stats'] = {
+            'total_files': len(all_resources),
+            'total_size': format_file_size(total_size),
+            'total_size_bytes': total_size,
+            'recent_uploads': recent_count
+        }
+    return stats
+
+def conditional_response(response, cache_control, etag=None):
+    """Set ETag and Cache-Control headers, answering a matching If-None-Match with 304"""
+    if etag:
+        response.set_etag(etag)
+    else:
+        response.add_etag()
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+def invalidate_resources():
+    """Force the next get_resources() call to fetch a fresh listing"""
+    with _generation_lock:
+        _resources_cache["generation"] += 1
+        _resources_cache["data"] = None
+        _resources_cache["ts"] = 0
+
+def upload_to_cloudinary(file):
+    """Upload file to Cloudinary"""
+    try:
+        # The stored original_filename is shown in the page and in download headers,
+        # so never let the raw client-supplied name through
+        original_filename = secure_filename(file.filename)
         
         # Keep Cloudinary auto-detection for resource type
         resource_type = 'auto'
-        print(f"Uploading {original_filename} as 'auto' resource type to avoid restrictions")
+        logger.debug("Uploading %s as %s resource type", original_filename, resource_type)
         
-        # Upload to Cloudinary with original filename
-        print(f"Uploading {original_filename} as {resource_type} resource type")
-        
-        result = cloudinary.uploader.upload(
-            file,
+        # Cloudinary derives the public_id from the filename and appends a
+        # random suffix, so no listing is needed to avoid name collisions.
+        # upload_large sends the stream in chunks rather than reading it into memory
+        result = cloudinary.uploader.upload_large(
+            file.stream,
+            chunk_size=app.config['CLOUDINARY_UPLOAD_CHUNK_SIZE'],
             resource_type=resource_type,
             folder=app.config['CLOUDINARY_FOLDER'],
-            public_id=final_filename,  # Just the filename, folder will be added automatically
-            use_filename=False,  # Don't use Cloudinary's filename generation
-            unique_filename=False,  # Don't make unique
+            filename=original_filename,  # Sent as the multipart filename for use_filename
+            use_filename=True,  # Base the public_id on the original filename
+            unique_filename=True,  # Let Cloudinary guarantee uniqueness
             overwrite=False,
             access_mode='public',  # Make files publicly accessible
             type='upload'  # Ensure it's uploaded as public upload
         )
-        print(f"Upload result: {result}")
+        logger.debug("Upload result: %s", result)
+        invalidate_resources()
         return result
     except Exception as e:
-        print(f"Error uploading to Cloudinary: {e}")
+        logger.error("Error uploading to Cloudinary: %s", e)
         return None
 
-def delete_from_cloudinary(public_id, resource_type="auto"):
+def delete_from_cloudinary(public_id, resource_type):
     """Delete file from Cloudinary"""
     try:
-        print(f"Attempting to delete: {public_id}")
+        logger.debug("Attempting to delete: %s as %s", public_id, resource_type)
         
-        # Try different resource types if auto doesn't work
-        resource_types = [resource_type]
-        if resource_type == "auto":
-            resource_types = ["image", "video", "raw"]
-        
-        for rt in resource_types:
-            try:
-                print(f"Trying resource type: {rt}")
-                result = cloudinary.uploader.destroy(public_id, resource_type=rt)
-                if result.get('result') == 'ok':
-                    print(f"Successfully deleted with resource type: {rt}")
-                    return True
-                else:
-                    print(f"Delete failed with resource type {rt}: {result}")
-            except Exception as e:
-                print(f"Error with resource type {rt}: {e}")
-                continue
+        # The resource type comes from the listing, so one destroy call is enough
+        result = _with_retry(_destroy, public_id, resource_type)
+        if result.get('result') == 'ok':
+            logger.info("Deleted %s with resource type: %s", public_id, resource_type)
+            invalidate_resources()
+            return True
         
+        logger.warning("Delete failed for %s with resource type %s: %s", public_id, resource_type, result)
         return False
     except Exception as e:
-        print(f"Error deleting from Cloudinary: {e}")
+        logger.error("Error deleting from Cloudinary: %s", e)
         return False
 
+def delete_many_from_cloudinary(resources):
+    """Delete several files from Cloudinary, one call per resource type; returns the number deleted"""
+    # Group public_ids by resource type, the Admin API deletes one type per call
+    by_type = {}
+    for resource in resources:
+        by_type.setdefault(resource.get('resource_type'), []).append(resource.get('public_id'))
+    
+    deleted = 0
+    for resource_type, public_ids in by_type.items():
+        # delete_resources accepts at most 100 public_ids per call
+        for i in range(0, len(public_ids), 100):
+            batch = public_ids[i:i + 100]
+            try:
+                result = _with_retry(cloudinary.api.delete_resources, batch, resource_type=resource_type, type='upload')
+                deleted += sum(1 for status in result.get('deleted', {}).values() if status == 'deleted')
+            except Exception as e:
+                logger.error("Error deleting %s files from Cloudinary: %s", resource_type, e)
+    
+    if deleted:
+        invalidate_resources()
+    return deleted
+
 @app.route('/')
 def index():
     # Get list of files from Cloudinary
     files = []
     try:
-        # List all resource types in the configured folder
-        resource_types = ['image', 'video', 'raw', 'auto']
-        
-        for resource_type in resource_types:
-            try:
-                result = cloudinary.api.resources(
-                    type="upload",
-                    resource_type=resource_type,
-                    prefix=f"{app.config['CLOUDINARY_FOLDER']}/",
-                    max_results=100,
-                    sort_by="created_at",
-                    sort_direction="desc"
-                )
-                
-                for resource in result.get('resources', []):
-                    file_info = get_file_info(resource)
-                    if file_info:
-                        files.append(file_info)
-            except Exception as e:
-                print(f"Error fetching {resource_type} files: {e}")
-                continue
-                
+        files = get_files()
     except Exception as e:
-        print(f"Error fetching files from Cloudinary: {e}")
+        logger.error("Error fetching files from Cloudinary: %s", e)
         flash('Error loading files from cloud storage', 'error')
     
-    # Sort files by modification time (newest first)
-    files.sort(key=lambda x: x['modified'], reverse=True)
-    return render_template('index.html', files=files)
+    # The cached listing is already sorted newest first
+    response = make_response(render_template('index.html', files=files))
+    # Flash messages change the page body and so its ETag; browsers must revalidate every time
+    return conditional_response(response, 'private, no-cache')
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -281,79 +637,39 @@ def upload_file():
             else:
                 flash('Error uploading file to cloud storage', 'error')
         except Exception as e:
-            print(f"Upload error: {e}")
+            logger.error("Upload error: %s", e)
             flash('Error uploading file to cloud storage', 'error')
     else:
         flash('File type not allowed. Please upload a valid file.', 'error')
     
     return redirect(url_for('index'))
 
+@app.errorhandler(413)
+def file_too_large(e):
+    max_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    flash(f'File is too large. Maximum upload size is {max_mb}MB.', 'error')
+    return redirect(url_for('index'))
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
         # Find the file in Cloudinary by filename across all resource types
-        resource_types = ['image', 'video', 'raw', 'auto']
-        file_url = None
-        original_filename = None
-        
-        for resource_type in resource_types:
-            try:
-                result = cloudinary.api.resources(
-                    type="upload",
-                    resource_type=resource_type,
-                    prefix=f"{app.config['CLOUDINARY_FOLDER']}/",
-                    max_results=100
-                )
-                
-                for resource in result.get('resources', []):
-                    # Try multiple ways to match the filename
-                    resource_filename = resource.get('original_filename') or resource.get('public_id', '').split('/')[-1]
-                    if resource_filename == filename:
-                        file_url = resource.get('secure_url')
-                        original_filename = resource_filename
-                        
-                        # For raw files, generate a signed URL for secure access
-                        if resource_type == 'raw':
-                            from cloudinary import utils as cloudinary_utils
-                            public_id = resource.get('public_id')
-                            
-                            # Generate a signed URL for secure access to raw files
-                            signed_url, options = cloudinary_utils.cloudinary_url(
-                                public_id,
-                                resource_type='raw',
-                                type='upload',
-                                sign_url=True,
-                                secure=True,
-                                version=resource.get('version')
-                            )
-                            print(f"Generated signed download URL: {signed_url}")
-                            file_url = signed_url
-                        
-                        break
-                
-                if file_url and original_filename:
-                    break
-            except Exception as e:
-                print(f"Error searching {resource_type} files: {e}")
-                continue
-        
-        if file_url and original_filename:
+        resource = find_resource(filename)
+        if resource:
             # Redirect to Cloudinary's signed attachment URL for reliable downloads
-            from cloudinary import utils as cloudinary_utils
-            signed_url, _ = cloudinary_utils.cloudinary_url(
+            signed_url = _signed_attachment_url(
                 resource.get('public_id'),
-                resource_type=resource.get('resource_type', 'auto'),
-                type='upload',
-                sign_url=True,
-                secure=True,
-                attachment=original_filename
+                resource.get('resource_type', 'auto'),
+                resource.get('version'),
+                resource_filename(resource),
+                resource.get('format')
             )
             return redirect(signed_url)
         else:
             flash('File not found in cloud storage', 'error')
             
     except Exception as e:
-        print(f"Download error: {e}")
+        logger.error("Download error: %s", e)
         flash(f'Error downloading file: {str(e)}', 'error')
     
     return redirect(url_for('index'))
@@ -364,33 +680,31 @@ def download_file_by_id(public_id):
     try:
         # Clean the public_id
         clean_public_id = unquote(public_id)
-        print(f"Downloading file with public_id: {clean_public_id}")
+        logger.debug("Downloading file with public_id: %s", clean_public_id)
         
-        # Try to get file info from Cloudinary and redirect to signed attachment URL
-        resource_types = ['image', 'video', 'raw', 'auto']
-        for rt in resource_types:
-            try:
-                result = cloudinary.api.resource(clean_public_id, resource_type=rt)
-                if result and result.get('public_id'):
-                    original_filename = result.get('original_filename') or clean_public_id.split('/')[-1]
-                    from cloudinary import utils as cloudinary_utils
-                    signed_url, _ = cloudinary_utils.cloudinary_url(
-                        result.get('public_id'),
-                        resource_type=rt,
-                        type='upload',
-                        sign_url=True,
-                        secure=True,
-                        attachment=original_filename
-                    )
-                    print(f"Redirecting to signed attachment URL for {original_filename}")
-                    return redirect(signed_url)
-            except Exception as e:
-                print(f"Error with resource type {rt}: {e}")
-                continue
+        # Use the cached listing first, and only ask Cloudinary about each
+        # resource type when the file isn't in it
+        result = find_resource_by_id(clean_public_id)
+        rt = result.get('resource_type') if result else None
+        if not result:
+            result, rt = probe_resource([clean_public_id])
+        
+        # Redirect to signed attachment URL
+        if result:
+            original_filename = result.get('original_filename') or clean_public_id.split('/')[-1]
+            signed_url = _signed_attachment_url(
+                result.get('public_id'),
+                rt,
+                result.get('version'),
+                original_filename,
+                result.get('format')
+            )
+            logger.debug("Redirecting to signed attachment URL for %s", original_filename)
+            return redirect(signed_url)
         flash('File not found in cloud storage', 'error')
             
     except Exception as e:
-        print(f"Download by ID error: {e}")
+        logger.error("Download by ID error: %s", e)
         flash(f'Error downloading file: {str(e)}', 'error')
     
     return redirect(url_for('index'))
@@ -399,29 +713,16 @@ def download_file_by_id(public_id):
 def download_file_archive(public_id):
     """Alternative download using archive method - should work for restricted files"""
     try:
-        import zipfile
-        import io
-        import cloudinary.utils
-        
         # Clean the public_id
         clean_public_id = unquote(public_id)
-        print(f"Archive download for: {clean_public_id}")
+        logger.debug("Archive download for: %s", clean_public_id)
         
         # Get file info first
-        resource_types = ['image', 'video', 'raw']
         original_filename = None
-        resource_type = None
-        
-        for rt in resource_types:
-            try:
-                result = cloudinary.api.resource(clean_public_id, resource_type=rt)
-                if result:
-                    original_filename = result.get('original_filename') or clean_public_id.split('/')[-1]
-                    resource_type = rt
-                    print(f"Found: {original_filename} as {rt}")
-                    break
-            except:
-                continue
+        result, resource_type = probe_resource([clean_public_id])
+        if result:
+            original_filename = result.get('original_filename') or clean_public_id.split('/')[-1]
+            logger.debug("Found: %s as %s", original_filename, resource_type)
         
         if not original_filename:
             flash('File not found', 'error')
@@ -432,97 +733,128 @@ def download_file_archive(public_id):
             # Method: Use Admin API with basic authentication
             admin_url = f"https://api.cloudinary.com/v1_1/{app.config['CLOUDINARY_CLOUD_NAME']}/resources/{resource_type}/upload/{clean_public_id}"
             
-            print(f"Admin API URL: {admin_url}")
-            
-            # Use basic auth with API credentials
-            import base64
-            credentials = base64.b64encode(f"{app.config['CLOUDINARY_API_KEY']}:{app.config['CLOUDINARY_API_SECRET']}".encode()).decode()
-            
-            headers = {
-                'Authorization': f'Basic {credentials}',
-                'Content-Type': 'application/json'
-            }
+            logger.debug("Admin API URL: %s", admin_url)
             
             # Get resource info
-            admin_response = requests.get(admin_url, headers=headers)
-            print(f"Admin API status: {admin_response.status_code}")
+            admin_response = _http.get(admin_url, headers=_CLOUDINARY_HEADERS, timeout=(5, 30))
+            logger.debug("Admin API status: %s", admin_response.status_code)
             
             if admin_response.status_code == 200:
                 resource_data = admin_response.json()
                 secure_url = resource_data.get('secure_url')
-                print(f"Got secure URL: {secure_url}")
+                logger.debug("Got secure URL: %s", secure_url)
                 
-                # Now try to download the file using the secure URL with authentication
-                download_response = requests.get(secure_url, headers=headers, timeout=30)
-                print(f"Download status: {download_response.status_code}")
-                print(f"Content-Type: {download_response.headers.get('content-type')}")
-                print(f"Content-Length: {download_response.headers.get('content-length')}")
+                # Now try to download the file using the secure URL with authentication,
+                # streaming it through instead of holding the whole body in memory
+                download_response = _http.get(secure_url, headers=_CLOUDINARY_HEADERS, stream=True, timeout=(5, 60))
+                logger.debug("Download status: %s", download_response.status_code)
+                logger.debug("Content-Type: %s", download_response.headers.get('content-type'))
+                logger.debug("Content-Length: %s", download_response.headers.get('content-length'))
                 
                 if download_response.status_code == 200:
-                    file_content = download_response.content
-                    print(f"Downloaded {len(file_content)} bytes successfully!")
+                    def generate():
+                        try:
+                            for chunk in download_response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                                yield chunk
+                        finally:
+                            download_response.close()
+                    
+                    response_headers = {
+                        'Content-Disposition': attachment_disposition(original_filename)
+                    }
+                    # The upstream length only matches the body we send when it isn't compressed
+                    content_length = download_response.headers.get('content-length')
+                    if content_length and not download_response.headers.get('content-encoding'):
+                        response_headers['Content-Length'] = content_length
                     
                     # Return the file
                     mime_type = get_mime_type(original_filename)
                     return Response(
-                        file_content,
+                        stream_with_context(generate()),
                         mimetype=mime_type,
-                        headers={
-                            'Content-Disposition': f'attachment; filename="{original_filename}"',
-                            'Content-Length': str(len(file_content))
-                        }
+                        headers=response_headers
                     )
                 else:
-                    print(f"Direct download failed: {download_response.status_code}")
+                    # Headers are all we need from a failed download; closing here skips
+                    # its body and hands the connection back to the pool
+                    download_response.close()
+                    logger.warning("Direct download failed: %s", download_response.status_code)
             else:
-                print(f"Admin API failed: {admin_response.status_code}")
-                print(f"Response: {admin_response.text}")
+                logger.warning("Admin API failed: %s", admin_response.status_code)
+                logger.warning("Response: %s", admin_response.text)
                 
         except Exception as e:
-            print(f"Admin API method failed: {e}")
+            logger.warning("Admin API method failed: %s", e)
         
         # Fallback: Try the archive method with corrected signature
         try:
-            print("Trying fallback archive method...")
+            logger.debug("Trying fallback archive method...")
             # Use a simpler approach - try without signature first
             simple_archive_url = f"https://api.cloudinary.com/v1_1/{app.config['CLOUDINARY_CLOUD_NAME']}/image/generate_archive"
             simple_archive_url += f"?public_ids={clean_public_id}&resource_type={resource_type}&mode=download&target_format=zip"
             
-            # Try with basic auth
-            import base64
-            credentials = base64.b64encode(f"{app.config['CLOUDINARY_API_KEY']}:{app.config['CLOUDINARY_API_SECRET']}".encode()).decode()
-            headers = {'Authorization': f'Basic {credentials}'}
-            
-            response = requests.get(simple_archive_url, headers=headers, timeout=30)
-            print(f"Simple archive status: {response.status_code}")
+            response = _http.get(simple_archive_url, headers=_CLOUDINARY_HEADERS, stream=True, timeout=(5, 60))
+            logger.debug("Simple archive status: %s", response.status_code)
             
             if response.status_code == 200:
-                # Extract file from zip
-                import zipfile
-                import io
-                with zipfile.ZipFile(io.BytesIO(response.content)) as zip_file:
-                    files = zip_file.namelist()
+                # ZipFile needs a seekable file, so spool the archive (to disk once it
+                # gets large) and then stream the first member out of it
+                spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+                zip_file = member = None
+                
+                def cleanup():
+                    for f in (member, zip_file, spool):
+                        if f is not None:
+                            f.close()
+                
+                try:
+                    try:
+                        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                            spool.write(chunk)
+                    finally:
+                        response.close()
+                    spool.seek(0)
+                    
+                    zip_file = zipfile.ZipFile(spool)
+                    files = zip_file.infolist()
                     if files:
-                        file_content = zip_file.read(files[0])
-                        print(f"Extracted {len(file_content)} bytes from archive")
+                        member = zip_file.open(files[0])
+                        logger.debug("Extracting %s bytes from archive", files[0].file_size)
+                        
+                        def generate():
+                            while True:
+                                chunk = member.read(STREAM_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                yield chunk
                         
-                        # Return the file
+                        # Return the file; the spool is closed when the response is,
+                        # even if the body is never iterated
                         mime_type = get_mime_type(original_filename)
-                        return Response(
-                            file_content,
+                        file_response = Response(
+                            stream_with_context(generate()),
                             mimetype=mime_type,
                             headers={
-                                'Content-Disposition': f'attachment; filename="{original_filename}"',
-                                'Content-Length': str(len(file_content))
+                                'Content-Disposition': attachment_disposition(original_filename),
+                                'Content-Length': str(files[0].file_size)
                             }
                         )
+                        file_response.call_on_close(cleanup)
+                        return file_response
+                except Exception:
+                    # e.g. BadZipFile on a truncated or HTML error body
+                    cleanup()
+                    raise
+                cleanup()
+            else:
+                response.close()
         except Exception as e:
-            print(f"Archive fallback failed: {e}")
+            logger.warning("Archive fallback failed: %s", e)
         
         flash('Download failed', 'error')
         
     except Exception as e:
-        print(f"Archive download error: {e}")
+        logger.error("Archive download error: %s", e)
         flash(f'Download error: {str(e)}', 'error')
     
     return redirect(url_for('index'))
@@ -532,76 +864,77 @@ def download_zip_file(public_id):
     """Special download route just for ZIP files - handles disguised filenames"""
     try:
         clean_public_id = unquote(public_id)
-        print(f"ZIP download for: {clean_public_id}")
+        logger.debug("ZIP download for: %s", clean_public_id)
         
         # For disguised ZIP files, try looking for .txt version
         if clean_public_id.endswith('.zip'):
             txt_public_id = clean_public_id.replace('.zip', '.txt')
-            print(f"Looking for disguised ZIP as: {txt_public_id}")
+            logger.debug("Looking for disguised ZIP as: %s", txt_public_id)
         else:
             txt_public_id = clean_public_id
         
-        # Search for the file (might be disguised as .txt)
-        resource_types = ['raw', 'auto', 'image', 'video']
-        file_url = None
+        # Search for the file (might be disguised as .txt), trying both the
+        # original public_id and the .txt version
         original_filename = clean_public_id.split('/')[-1]  # Use the original ZIP name
+        found, rt = probe_resource([clean_public_id, txt_public_id])
+        if found:
+            logger.debug("Found disguised ZIP: %s as %s", found.get('public_id'), rt)
         
-        for rt in resource_types:
-            try:
-                # Try both the original public_id and the .txt version
-                for pid in [clean_public_id, txt_public_id]:
-                    try:
-                        result = cloudinary.api.resource(pid, resource_type=rt)
-                        if result:
-                            file_url = result.get('secure_url')
-                            print(f"Found disguised ZIP: {pid} with URL: {file_url}")
-                            break
-                    except:
-                        continue
-                if file_url:
-                    break
-            except:
-                continue
-        
-        if file_url:
-            print(f"Downloading disguised ZIP from: {file_url}")
+        if found:
+            # Ensure original_filename ends with .zip
+            if not original_filename.endswith('.zip'):
+                original_filename = original_filename + '.zip'
+            
+            if found.get('public_id', '').endswith('.zip'):
+                logger.debug("Redirecting to signed attachment URL as: %s", original_filename)
+                
+                # A real .zip is delivered as one, so let the browser fetch the
+                # bytes straight from Cloudinary's CDN
+                signed_url = _signed_attachment_url(
+                    found.get('public_id'),
+                    found.get('resource_type', rt),
+                    found.get('version'),
+                    original_filename,
+                    found.get('format')
+                )
+                return redirect(signed_url)
             
-            # Download the file (it's stored as .txt but contains ZIP data)
-            response = requests.get(file_url, stream=True, timeout=30)
-            print(f"ZIP response status: {response.status_code}")
-            print(f"Original filename will be: {original_filename}")
+            # A disguised ZIP would be delivered as .txt / text/plain, so stream it
+            # through with ZIP headers instead
+            response = _http.get(found.get('secure_url'), stream=True, timeout=(5, 60))
+            logger.debug("ZIP response status: %s", response.status_code)
             
             if response.status_code == 200:
-                # Ensure original_filename ends with .zip
-                if not original_filename.endswith('.zip'):
-                    original_filename = original_filename + '.zip'
-                
-                print(f"Serving file as: {original_filename}")
-                
-                # Return as ZIP file with correct filename and strong headers
                 def generate():
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
+                    try:
+                        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
                             yield chunk
+                    finally:
+                        response.close()
+                
+                response_headers = {
+                    'Content-Disposition': attachment_disposition(original_filename),
+                    'Cache-Control': 'no-cache',
+                    'X-Content-Type-Options': 'nosniff'
+                }
+                # The upstream length only matches the body we send when it isn't compressed
+                content_length = response.headers.get('content-length')
+                if content_length and not response.headers.get('content-encoding'):
+                    response_headers['Content-Length'] = content_length
                 
                 return Response(
-                    generate(),
+                    stream_with_context(generate()),
                     mimetype='application/zip',
-                    headers={
-                        'Content-Disposition': f'attachment; filename="{original_filename}"',
-                        'Content-Type': 'application/zip',
-                        'Content-Length': response.headers.get('content-length', ''),
-                        'Cache-Control': 'no-cache',
-                        'X-Content-Type-Options': 'nosniff'
-                    }
+                    headers=response_headers
                 )
-            else:
-                flash(f'ZIP download failed with status: {response.status_code}', 'error')
+            
+            response.close()
+            flash(f'ZIP download failed with status: {response.status_code}', 'error')
         else:
             flash('ZIP file not found', 'error')
             
     except Exception as e:
-        print(f"ZIP download error: {e}")
+        logger.error("ZIP download error: %s", e)
         flash(f'ZIP download error: {str(e)}', 'error')
     
     return redirect(url_for('index'))
@@ -609,34 +942,17 @@ def download_zip_file(public_id):
 @app.route('/delete/<filename>', methods=['POST'])
 def delete_file(filename):
     try:
-        print(f"Attempting to delete file: {filename}")
-        
-        # Find the file in Cloudinary by filename
-        result = cloudinary.api.resources(
-            type="upload",
-            prefix=f"{app.config['CLOUDINARY_FOLDER']}/",
-            max_results=100
-        )
-        
-        public_id = None
-        resource_type = "auto"
-        original_filename = None
+        logger.debug("Attempting to delete file: %s", filename)
         
-        # Debug: print all resources to see what we're working with
-        print(f"Found {len(result.get('resources', []))} resources")
-        for resource in result.get('resources', []):
-            print(f"Resource: {resource.get('original_filename')} vs {filename}")
-            if resource.get('original_filename') == filename:
-                public_id = resource.get('public_id')
-                resource_type = resource.get('resource_type', 'auto')
-                original_filename = resource.get('original_filename')
-                print(f"Found matching file: {original_filename} with public_id: {public_id}")
-                break
-        
-        if public_id and original_filename:
+        # Look the file up in the cached filename index
+        resource = find_resource(filename)
+        if resource:
+            public_id = resource.get('public_id')
+            original_filename = resource_filename(resource)
+            logger.debug("Found matching file: %s with public_id: %s", original_filename, public_id)
+            
             # Delete from Cloudinary
-            print(f"Deleting from Cloudinary: {public_id}")
-            if delete_from_cloudinary(public_id, resource_type):
+            if delete_from_cloudinary(public_id, resource.get('resource_type', 'auto')):
                 flash(f'File "{original_filename}" deleted successfully from cloud!', 'success')
             else:
                 flash('Error deleting file from cloud storage', 'error')
@@ -644,7 +960,7 @@ def delete_file(filename):
             flash(f'File "{filename}" not found in cloud storage', 'error')
             
     except Exception as e:
-        print(f"Delete error: {e}")
+        logger.error("Delete error: %s", e)
         flash(f'Error deleting file: {str(e)}', 'error')
     
     return redirect(url_for('index'))
@@ -653,36 +969,56 @@ def delete_file(filename):
 def delete_file_by_id(public_id):
     """Delete file by Cloudinary public ID"""
     try:
-        print(f"Attempting to delete file by ID: {public_id}")
+        logger.debug("Attempting to delete file by ID: %s", public_id)
         
         # Clean the public_id - remove any URL encoding
         clean_public_id = unquote(public_id)
-        print(f"Cleaned public_id: {clean_public_id}")
+        logger.debug("Cleaned public_id: %s", clean_public_id)
         
-        # Delete from Cloudinary directly using public ID
-        if delete_from_cloudinary(clean_public_id, "auto"):
+        # Look up the resource type in the listing instead of trying each one
+        resource = find_resource_by_id(clean_public_id)
+        if not resource:
+            flash('File not found in cloud storage', 'error')
+        elif delete_from_cloudinary(clean_public_id, resource.get('resource_type')):
             flash(f'File deleted successfully from cloud!', 'success')
         else:
             flash('Error deleting file from cloud storage', 'error')
             
     except Exception as e:
-        print(f"Delete by ID error: {e}")
+        logger.error("Delete by ID error: %s", e)
         flash(f'Error deleting file: {str(e)}', 'error')
     
     return redirect(url_for('index'))
 
+@app.route('/delete_batch', methods=['POST'])
+def delete_files_batch():
+    """Delete several files by Cloudinary public ID in as few calls as possible"""
+    try:
+        public_ids = [unquote(public_id) for public_id in request.form.getlist('public_ids')]
+        if not public_ids:
+            flash('No files selected', 'error')
+            return redirect(url_for('index'))
+        
+        resources = [resource for resource in map(find_resource_by_id, public_ids) if resource]
+        deleted = delete_many_from_cloudinary(resources) if resources else 0
+        
+        if deleted == len(public_ids):
+            flash(f'{deleted} files deleted successfully from cloud!', 'success')
+        else:
+            flash(f'Deleted {deleted} of {len(public_ids)} files from cloud storage', 'error')
+            
+    except Exception as e:
+        logger.error("Batch delete error: %s", e)
+        flash(f'Error deleting files: {str(e)}', 'error')
+    
+    return redirect(url_for('index'))
+
 @app.route('/debug/files')
 def debug_files():
     """Debug route to see file information"""
     try:
-        result = cloudinary.api.resources(
-            type="upload",
-            prefix=f"{app.config['CLOUDINARY_FOLDER']}/",
-            max_results=100
-        )
-        
         debug_info = []
-        for resource in result.get('resources', []):
+        for resource in get_resources():
             debug_info.append({
                 'public_id': resource.get('public_id'),
                 'original_filename': resource.get('original_filename'),
@@ -697,89 +1033,25 @@ def debug_files():
 @app.route('/api/files')
 def api_files():
     """API endpoint to get file list as JSON"""
-    files = []
     try:
-        # List all resource types in the configured folder
-        resource_types = ['image', 'video', 'raw']
-        
-        for resource_type in resource_types:
-            try:
-                result = cloudinary.api.resources(
-                    type="upload",
-                    resource_type=resource_type,
-                    prefix=f"{app.config['CLOUDINARY_FOLDER']}/",
-                    max_results=100,
-                    sort_by="created_at",
-                    sort_direction="desc"
-                )
-                
-                for resource in result.get('resources', []):
-                    file_info = get_file_info(resource)
-                    if file_info:
-                        files.append(file_info)
-            except Exception as e:
-                print(f"Error fetching {resource_type} files for API: {e}")
-                continue
-                
+        payload, etag = get_files_json()
     except Exception as e:
-        print(f"API error: {e}")
+        logger.exception("API error: %s", e)
         return jsonify({'error': 'Failed to fetch files'}), 500
     
-    return jsonify(files)
+    return conditional_response(Response(payload, mimetype='application/json'), 'no-cache', etag)
 
 @app.route('/api/stats')
 def api_stats():
     """API endpoint to get file statistics"""
     try:
-        # List all resource types in the configured folder
-        resource_types = ['image', 'video', 'raw']
-        all_resources = []
-        
-        for resource_type in resource_types:
-            try:
-                result = cloudinary.api.resources(
-                    type="upload",
-                    resource_type=resource_type,
-                    prefix=f"{app.config['CLOUDINARY_FOLDER']}/",
-                    max_results=1000
-                )
-                all_resources.extend(result.get('resources', []))
-            except Exception as e:
-                print(f"Error fetching {resource_type} files for stats: {e}")
-                continue
-        
-        total_files = len(all_resources)
-        total_size = sum(resource.get('bytes', 0) for resource in all_resources)
-        
-        # Count recent uploads (last 24 hours)
-        recent_count = 0
-        current_time = datetime.datetime.now()
-        for resource in all_resources:
-            created_at = resource.get('created_at')
-            if created_at:
-                try:
-                    # Try to parse as Unix timestamp (integer)
-                    if isinstance(created_at, (int, str)) and str(created_at).isdigit():
-                        created_date = datetime.datetime.fromtimestamp(int(created_at))
-                    else:
-                        # Parse ISO format timestamp
-                        created_date = datetime.datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    if (current_time - created_date).days < 1:
-                        recent_count += 1
-                except (ValueError, TypeError):
-                    # Skip if parsing fails
-                    continue
-        
-        return jsonify({
-            'total_files': total_files,
-            'total_size': format_file_size(total_size),
-            'total_size_bytes': total_size,
-            'recent_uploads': recent_count
-        })
+        response = jsonify(get_stats())
+        return conditional_response(response, 'no-cache')
         
     except Exception as e:
-        print(f"Stats API error: {e}")
+        logger.exception("Stats API error: %s", e)
         return jsonify({'error': 'Failed to fetch statistics'}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000) 
+    # The debugger and reloader are opt-in; set FLASK_DEBUG=1 to enable them
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000, threaded=True) 
@@ -1,4 +1,5 @@
 import os
+import logging
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -15,24 +16,42 @@ class Config:
     
     # File Upload Configuration
     MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
-    ALLOWED_EXTENSIONS = {
+    # Flask/Werkzeug reject larger request bodies before parsing the multipart form
+    MAX_CONTENT_LENGTH = MAX_FILE_SIZE
+    ALLOWED_EXTENSIONS = frozenset({
         'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 
         'xls', 'xlsx', 'zip', 'rar', 'mp3', 'mp4', 'avi', 'mov'
-    }
+    })
     
     # Cloudinary Upload Settings
     CLOUDINARY_FOLDER = 'file_manager'
     CLOUDINARY_RESOURCE_TYPE = 'raw'
+    # Uploads are sent to Cloudinary in chunks of this many bytes
+    CLOUDINARY_UPLOAD_CHUNK_SIZE = 6 * 1000 * 1000
+    # Resources fetched per Admin API listing page (500 is the most Cloudinary allows)
+    CLOUDINARY_PAGE_SIZE = 500
+    
+    # Seconds a Cloudinary folder listing is reused before it is fetched again
+    RESOURCE_CACHE_TTL = 30
+    
+    # Logging
+    LOG_LEVEL = 'INFO'
+    LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
     
     @staticmethod
     def init_app(app):
-        pass
+        # Configure the root logger once; the level comes from the active config
+        logging.basicConfig(level=app.config['LOG_LEVEL'], format=app.config['LOG_FORMAT'])
+        # Listing prefix for the upload folder, derived once from CLOUDINARY_FOLDER
+        app.config['_CLOUDINARY_PREFIX'] = app.config['CLOUDINARY_FOLDER'] + '/'
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    LOG_LEVEL = 'DEBUG'
 
 class ProductionConfig(Config):
     DEBUG = False
+    LOG_LEVEL = 'WARNING'
 
 class TestingConfig(Config):
     TESTING = True
@@ -0,0 +1,18 @@
+# Gunicorn configuration, picked up automatically when started as `gunicorn app:app`
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Requests spend nearly all their time waiting on Cloudinary, so threaded
+# workers let many of them overlap instead of blocking one process each.
+# The folder listing is cached per process and uploads/deletes only clear the
+# copy in the process that handled them, so run a single process by default;
+# with more workers, other processes can show a stale listing for up to
+# RESOURCE_CACHE_TTL seconds after a change
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# Uploads are passed through to Cloudinary, leave room for large files
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5